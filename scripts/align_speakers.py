@@ -10,129 +10,266 @@ Produces:
 - Diarised transcript in markdown format with speaker labels
 """
 
+import io
 import json
 import re
 import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from itertools import accumulate, groupby
 from pathlib import Path
+from typing import Any
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-def parse_srt(srt_path: str) -> list[dict]:
-    """Parse SRT file into list of segments with timestamps."""
-    segments = []
-    with open(srt_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+# SRT timestamp line: 00:00:00,000 --> 00:00:05,000
+TS_RE = re.compile(
+    r'(\d{2}):(\d{2}):(\d{2})[,.](\d{3})\s*-->\s*(\d{2}):(\d{2}):(\d{2})[,.](\d{3})'
+)
 
-    # Split by double newline (SRT entry separator)
-    entries = re.split(r'\n\n+', content.strip())
 
-    for entry in entries:
-        lines = entry.strip().split('\n')
-        if len(lines) < 3:
-            continue
+def load_json(json_path: str) -> Any:
+    """Load a JSON file, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(Path(json_path).read_bytes())
+    with open(json_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@dataclass
+class TranscriptSegments:
+    """Transcript segments stored column-wise, in SRT order.
+
+    Row i of starts/ends/texts describes segment i.
+    """
+    starts: array = field(default_factory=lambda: array('d'))
+    ends: array = field(default_factory=lambda: array('d'))
+    texts: list = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.starts)
 
-        # Parse timestamp line: 00:00:00,000 --> 00:00:05,000
-        timestamp_match = re.match(
-            r'(\d{2}):(\d{2}):(\d{2})[,.](\d{3})\s*-->\s*(\d{2}):(\d{2}):(\d{2})[,.](\d{3})',
-            lines[1]
-        )
-        if not timestamp_match:
-            continue
 
-        # Convert to seconds
-        h1, m1, s1, ms1, h2, m2, s2, ms2 = map(int, timestamp_match.groups())
-        start = h1 * 3600 + m1 * 60 + s1 + ms1 / 1000
-        end = h2 * 3600 + m2 * 60 + s2 + ms2 / 1000
+def _parse_srt_entry(lines: list[str], segments: TranscriptSegments) -> None:
+    """Parse one SRT entry (index, timestamp, text lines) onto `segments`."""
+    lines = '\n'.join(lines).strip().split('\n')
+    if len(lines) < 3:
+        return
 
-        # Join text lines (subtitle may span multiple lines)
-        text = ' '.join(lines[2:])
+    # Parse timestamp line: 00:00:00,000 --> 00:00:05,000
+    timestamp_match = TS_RE.match(lines[1])
+    if not timestamp_match:
+        return
 
-        segments.append({
-            'start': start,
-            'end': end,
-            'text': text
-        })
+    # Convert to seconds
+    h1, m1, s1, ms1, h2, m2, s2, ms2 = map(int, timestamp_match.groups())
+    segments.starts.append(h1 * 3600 + m1 * 60 + s1 + ms1 / 1000)
+    segments.ends.append(h2 * 3600 + m2 * 60 + s2 + ms2 / 1000)
+
+    # Join text lines (subtitle may span multiple lines)
+    segments.texts.append(' '.join(lines[2:]))
+
+
+def parse_srt(srt_path: str) -> TranscriptSegments:
+    """Parse SRT file into transcript segments with timestamps.
+
+    Streams the file one entry at a time rather than reading it into memory.
+    """
+    segments = TranscriptSegments()
+    entry: list[str] = []
+
+    with open(srt_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if line:
+                entry.append(line)
+                continue
+
+            # Blank line ends the current entry (SRT entry separator)
+            if entry:
+                _parse_srt_entry(entry, segments)
+                entry = []
+
+    if entry:
+        _parse_srt_entry(entry, segments)
 
     return segments
 
 
-def parse_fluidaudio_json(json_path: str) -> list[dict]:
+@dataclass
+class SpeakerSegments:
+    """Speaker segments stored column-wise and sorted by start time.
+
+    Row i of starts/ends/speakers describes segment i.
+    """
+    starts: array
+    ends: array
+    speakers: list
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+
+def parse_fluidaudio_json(json_path: str) -> SpeakerSegments:
     """Parse FluidAudio diarisation output."""
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = load_json(json_path)
 
     # FluidAudio output format: list of segments with speakerId, startTimeSeconds, endTimeSeconds
     # Adjust based on actual FluidAudio output format
-    segments = []
+    items = []
 
     # Handle different possible formats
     if isinstance(data, list):
-        for item in data:
-            segments.append({
-                'speaker': item.get('speakerId', item.get('speaker', 'Unknown')),
-                'start': item.get('startTimeSeconds', item.get('start', 0)),
-                'end': item.get('endTimeSeconds', item.get('end', 0))
-            })
+        items = data
     elif isinstance(data, dict):
         # May be wrapped in a 'segments' key
         items = data.get('segments', data.get('results', [data]))
-        for item in items:
-            segments.append({
-                'speaker': item.get('speakerId', item.get('speaker', 'Unknown')),
-                'start': item.get('startTimeSeconds', item.get('start', 0)),
-                'end': item.get('endTimeSeconds', item.get('end', 0))
-            })
 
-    return sorted(segments, key=lambda x: x['start'])
+    starts = [item.get('startTimeSeconds', item.get('start', 0)) for item in items]
+    order = sorted(range(len(items)), key=starts.__getitem__)
+
+    return SpeakerSegments(
+        starts=array('d', (starts[i] for i in order)),
+        ends=array('d', (items[i].get('endTimeSeconds', items[i].get('end', 0)) for i in order)),
+        speakers=[items[i].get('speakerId', items[i].get('speaker', 'Unknown')) for i in order]
+    )
+
+
+class IntervalIndex:
+    """Sorted lookup structure over speaker segments.
+
+    Built once per transcript so each lookup is a binary search rather than
+    a scan over every speaker segment.
+    """
+
+    def __init__(self, speaker_segments: SpeakerSegments):
+        self.starts = speaker_segments.starts
+        self.ends = speaker_segments.ends
+        self.speakers = speaker_segments.speakers
 
+        # Running maximum of segment ends: the first index where this reaches
+        # `time` is the earliest segment that can still contain `time`
+        self.max_ends = list(accumulate(self.ends, max))
 
-def find_speaker_at_time(speaker_segments: list[dict], time: float) -> str:
+        # Midpoints sorted separately for the nearest-speaker fallback
+        # (stable sort keeps the earliest segment first on ties)
+        self.mid_order = sorted(
+            range(len(self.starts)),
+            key=lambda i: (self.starts[i] + self.ends[i]) / 2
+        )
+        self.mids = [(self.starts[i] + self.ends[i]) / 2 for i in self.mid_order]
+
+        # Position of the first entry in each run of equal midpoints, i.e. the
+        # earliest segment sharing that midpoint
+        self.mid_first = []
+        for pos, mid in enumerate(self.mids):
+            same = pos > 0 and mid == self.mids[pos - 1]
+            self.mid_first.append(self.mid_first[-1] if same else pos)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def nearest_speaker(self, time: float, pos: int) -> str:
+        """Speaker whose segment midpoint is closest to `time`.
+
+        `pos` is the first position in `mids` at or after `time`; only the
+        midpoints either side of it can be closest.
+        """
+        candidates = []
+        for neighbour in (pos - 1, pos):
+            if 0 <= neighbour < len(self.mids):
+                first = self.mid_first[neighbour]
+                candidates.append((abs(self.mids[first] - time), self.mid_order[first]))
+
+        _, nearest = min(candidates)
+        return self.speakers[nearest]
+
+
+def find_speaker_at_time(index: IntervalIndex, time: float) -> str:
     """Find which speaker was speaking at a given time."""
-    for seg in speaker_segments:
-        if seg['start'] <= time <= seg['end']:
-            return seg['speaker']
+    if not len(index):
+        return 'Unknown'
+
+    # Earliest segment with start <= time <= end
+    last_started = bisect_right(index.starts, time) - 1
+    first_open = bisect_left(index.max_ends, time)
+    if first_open <= last_started:
+        return index.speakers[first_open]
+
+    # If no exact match, find nearest speaker by segment midpoint
+    return index.nearest_speaker(time, bisect_left(index.mids, time))
+
+
+def assign_speakers(index: IntervalIndex, times: list[float]) -> list[str]:
+    """Look up the speaker for every time in one batch.
+
+    Transcript times arrive in order, so the lookups become a forward sweep:
+    each cursor only ever advances, for O(n + m) work in total.
+    """
+    if not len(index):
+        return ['Unknown'] * len(times)
+    if any(later < earlier for earlier, later in zip(times, times[1:])):
+        return [find_speaker_at_time(index, time) for time in times]
+
+    speakers = []
+    count = len(index)
+    started = 0     # segments with start <= time
+    first_open = 0  # earliest segment whose end may still reach time
+    mid_pos = 0     # first midpoint >= time
+
+    for time in times:
+        while started < count and index.starts[started] <= time:
+            started += 1
+        while first_open < count and index.max_ends[first_open] < time:
+            first_open += 1
+
+        if first_open < started:
+            speakers.append(index.speakers[first_open])
+            continue
 
-    # If no exact match, find nearest speaker
-    min_dist = float('inf')
-    nearest_speaker = 'Unknown'
-    for seg in speaker_segments:
-        mid = (seg['start'] + seg['end']) / 2
-        dist = abs(mid - time)
-        if dist < min_dist:
-            min_dist = dist
-            nearest_speaker = seg['speaker']
+        while mid_pos < count and index.mids[mid_pos] < time:
+            mid_pos += 1
+        speakers.append(index.nearest_speaker(time, mid_pos))
 
-    return nearest_speaker
+    return speakers
 
 
-def align_transcript(srt_segments: list[dict], speaker_segments: list[dict]) -> str:
+def align_transcript(srt_segments: TranscriptSegments, speaker_segments: SpeakerSegments) -> str:
     """Align transcript segments with speaker labels."""
-    if not srt_segments:
+    if not len(srt_segments):
         return ""
 
-    lines = []
-    current_speaker = None
-    current_text = []
-
-    for seg in srt_segments:
-        # Use midpoint of segment to determine speaker
-        mid_time = (seg['start'] + seg['end']) / 2
-        speaker = find_speaker_at_time(speaker_segments, mid_time)
-
-        if speaker != current_speaker:
-            # Flush previous speaker's text
-            if current_text and current_speaker:
-                lines.append(f"**Speaker {current_speaker}:** {' '.join(current_text)}")
-                lines.append("")
-            current_speaker = speaker
-            current_text = [seg['text']]
-        else:
-            current_text.append(seg['text'])
-
-    # Flush final speaker
-    if current_text and current_speaker:
-        lines.append(f"**Speaker {current_speaker}:** {' '.join(current_text)}")
-
-    return '\n'.join(lines)
+    # Use midpoint of each segment to determine speaker
+    index = IntervalIndex(speaker_segments)
+    mid_times = [(start + end) / 2 for start, end in zip(srt_segments.starts, srt_segments.ends)]
+    speakers = assign_speakers(index, mid_times)
+
+    # Emit one line per run of consecutive segments with the same speaker,
+    # separated by blank lines, into a single buffer. Runs with no speaker are
+    # skipped, but one at the very end still leaves a single trailing newline
+    # after the last line written.
+    buf = io.StringIO()
+    written = False
+    position = 0
+    for speaker, run in groupby(speakers):
+        run_length = sum(1 for _ in run)
+        run_texts = srt_segments.texts[position:position + run_length]
+        position += run_length
+
+        if speaker:
+            if written:
+                buf.write("\n\n")
+            buf.write(f"**Speaker {speaker}:** ")
+            buf.write(' '.join(run_texts))
+            written = True
+
+    if written and not speakers[-1]:
+        buf.write("\n")
+    return buf.getvalue()
 
 
 def main():
@@ -7,6 +7,7 @@ Design goals:
 - Conservative removals: only standalone filler tokens
 - Light formatting fixes after removal
 - Capitalise the first word of a sentence when it becomes sentence-initial after removals
+- Standard library only (no numeric imports)
 
 Usage:
   cleanup_filler_words.py <input_md> [--in-place] [--backup]
@@ -17,8 +18,21 @@ By default, rewrites the file in-place (because this skill uses it as a post-pro
 from __future__ import annotations
 
 import argparse
+import os
 import re
 from pathlib import Path
+from typing import Any, Callable, NamedTuple
+
+# Optional: also compile the patterns with RE2 (pip install pyre2) for
+# linear-time matching; enable with TRANSCRIBE_FILLERS_RE2=1. RE2's \b and \s
+# are ASCII-only, so it is only used for utterances where that makes no
+# difference (see _use_re2); everything else goes through `re`.
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+USE_RE2 = re2 is not None and os.environ.get("TRANSCRIBE_FILLERS_RE2", "0") == "1"
 
 FILLERS = [
     "um",
@@ -33,37 +47,101 @@ FILLERS = [
 # - erm+ matches erm, ermm...
 FILLER_RE = r"(?:um+|uh+|erm+|er)"
 
-RE_PARENS_ONLY = re.compile(rf"\(\s*(?P<f>{FILLER_RE})\s*\)", re.IGNORECASE)
-RE_FILLER_COMMA = re.compile(rf"\b(?P<f>{FILLER_RE})\b\s*,\s*", re.IGNORECASE)
-RE_FILLER_SPACED = re.compile(rf"\s+\b(?P<f>{FILLER_RE})\b\s+", re.IGNORECASE)
-RE_FILLER_START = re.compile(rf"^\s*\b(?P<f>{FILLER_RE})\b\s+", re.IGNORECASE)
-RE_FILLER_END = re.compile(rf"\s+\b(?P<f>{FILLER_RE})\b\s*$", re.IGNORECASE)
-RE_FILLER_STANDALONE = re.compile(rf"\b(?P<f>{FILLER_RE})\b", re.IGNORECASE)
 
-# Speaker label: **Name:**
-RE_SPEAKER = re.compile(r"^(\*\*[^\n]*?:\*\*)\s*(.*)$")
+class Patterns(NamedTuple):
+    """Compiled utterance cleanup patterns (one set per regex engine)."""
+    parens_only: Any
+    filler_comma: Any
+    filler_spaced: Any
+    filler_start: Any
+    filler_end: Any
+    filler_standalone: Any
+    punct_spacing: Any
+    dash: Any
+    spaced_hyphen: Any
+    multi_space: Any
+    capitalise: Any
+
+
+def _compile_patterns(compile: Callable[..., Any]) -> Patterns:
+    return Patterns(
+        parens_only=compile(rf"\(\s*(?P<f>{FILLER_RE})\s*\)", re.IGNORECASE),
+        filler_comma=compile(rf"\b(?P<f>{FILLER_RE})\b\s*,\s*", re.IGNORECASE),
+        filler_spaced=compile(rf"\s+\b(?P<f>{FILLER_RE})\b\s+", re.IGNORECASE),
+        filler_start=compile(rf"^\s*\b(?P<f>{FILLER_RE})\b\s+", re.IGNORECASE),
+        filler_end=compile(rf"\s+\b(?P<f>{FILLER_RE})\b\s*$", re.IGNORECASE),
+        filler_standalone=compile(rf"\b(?P<f>{FILLER_RE})\b", re.IGNORECASE),
+        # Spacing fixes after filler removal
+        # - whitespace before punctuation is dropped; a space is inserted after
+        #   punctuation that is directly followed by another character
+        punct_spacing=compile(r"\s*([,.;:!?])(\s*[,.;:!?]|\S)?"),
+        # - em/en dashes, then hyphens used as dashes with spaces around them
+        dash=compile(r"\s*[—–]\s*"),
+        spaced_hyphen=compile(r"\s+-\s+"),
+        multi_space=compile(r"\s{2,}"),
+        # Recapitalisation, one alternation for all three cases:
+        # - first letter of the string (after optional opening quotes/brackets)
+        # - first letter after sentence punctuation (allowing quotes/brackets/spaces)
+        # - lone "i" as a word
+        capitalise=compile(
+            r"^[\s\"'“”‘’\(\[\{]*[a-z]"
+            r"|[.!?](?:[\s\"'“”‘’\)\]\}]*[\s\"'“”‘’\(\[\{]*)?[a-z]"
+            r"|(?P<i>\bi\b)"
+        ),
+    )
 
 
-def _fix_spacing(text: str) -> str:
-    # Collapse multiple spaces
-    text = re.sub(r"[ \t]{2,}", " ", text)
+RE_PATTERNS = _compile_patterns(re.compile)
+RE2_PATTERNS = _compile_patterns(re2.compile) if USE_RE2 else None
+
+# ASCII whitespace that `re` matches with \s but RE2 does not
+RE_RE2_UNSAFE = re.compile(r"[\x0b\x1c-\x1f]")
+
+# Line boundaries recognised by str.splitlines(), normalised to "\n" so that
+# RE_SPEAKER sees the same lines
+RE_LINE_BREAK = re.compile(r"\r\n|[\r\x0b\x0c\x1c-\x1e\x85\u2028\u2029]")
+
+# Speaker label: **Name:** (matched line by line across the whole document)
+RE_SPEAKER = re.compile(r"^(\*\*[^\n]*?:\*\*)(.*)$", re.MULTILINE)
+
+
+def _capitalise(match: re.Match) -> str:
+    if match.group("i"):
+        return "I"
+    # Sentence start: the letter to capitalise is the last matched char
+    matched = match.group(0)
+    return matched[:-1] + matched[-1].upper()
+
+
+def _fix_punct_spacing(match: re.Match) -> str:
+    punct, following = match.group(1), match.group(2)
+    if not following:
+        return punct
+    return f"{punct} {following.lstrip()}"
+
+
+def _use_re2(text: str) -> bool:
+    # Outside ASCII (and for a few ASCII control characters) RE2's \b and \s
+    # disagree with `re`, e.g. "erübrigt" would lose its leading "er"
+    return USE_RE2 and text.isascii() and not RE_RE2_UNSAFE.search(text)
 
-    # Remove space before punctuation
-    text = re.sub(r"\s+([,.;:!?])", r"\1", text)
 
-    # Normalise spaces after punctuation (very light touch)
-    text = re.sub(r"([,.;:!?])(\S)", r"\1 \2", text)
+def _fix_spacing(text: str, patterns: Patterns = RE_PATTERNS) -> str:
+    # Remove space before punctuation and normalise spaces after it
+    text = patterns.punct_spacing.sub(_fix_punct_spacing, text)
 
     # Normalise em/en dashes (but don't touch hyphens inside words)
-    text = re.sub(r"\s*[—–]\s*", " — ", text)
+    text = patterns.dash.sub(" — ", text)
     # If a hyphen is used as a dash with spaces around it, normalise that too
-    text = re.sub(r"\s+-\s+", " — ", text)
-    text = re.sub(r"\s{2,}", " ", text)
+    text = patterns.spaced_hyphen.sub(" — ", text)
+
+    # Collapse multiple spaces
+    text = patterns.multi_space.sub(" ", text)
 
     return text.strip()
 
 
-def _capitalise_sentence_starts(text: str) -> str:
+def _capitalise_sentence_starts(text: str, patterns: Patterns = RE_PATTERNS) -> str:
     """Capitalise first alphabetic character after sentence boundaries.
 
     This intentionally focuses on obvious boundaries:
@@ -72,76 +150,54 @@ def _capitalise_sentence_starts(text: str) -> str:
 
     It also handles optional quotes/brackets immediately after the boundary.
     """
-
-    def cap_after_boundary(match: re.Match) -> str:
-        boundary = match.group("boundary")
-        prefix = match.group("prefix")
-        ch = match.group("ch")
-        return f"{boundary}{prefix}{ch.upper()}"
-
-    # Start of string
-    text = re.sub(r"^(?P<prefix>[\s\"'“”‘’\(\[\{]*)(?P<ch>[a-z])", lambda m: m.group("prefix") + m.group("ch").upper(), text)
-
-    # After sentence punctuation
-    text = re.sub(
-        r"(?P<boundary>[.!?])(?P<prefix>[\s\"'“”‘’\)\]\}]*[\s\"'“”‘’\(\[\{]*)?(?P<ch>[a-z])",
-        cap_after_boundary,
-        text,
-    )
-
-    # Special-case lone "i" as a word
-    text = re.sub(r"\bi\b", "I", text)
-
-    return text
+    return patterns.capitalise.sub(_capitalise, text)
 
 
 def cleanup_utterance(text: str) -> str:
     original = text
+    patterns = RE2_PATTERNS if _use_re2(text) else RE_PATTERNS
 
     # Remove (um) / (uh) / (erm)
-    text = RE_PARENS_ONLY.sub("", text)
+    text = patterns.parens_only.sub("", text)
 
     # Remove "um, " patterns
-    text = RE_FILLER_COMMA.sub("", text)
+    text = patterns.filler_comma.sub("", text)
 
     # Remove fillers surrounded by spaces
-    text = RE_FILLER_SPACED.sub(" ", text)
+    text = patterns.filler_spaced.sub(" ", text)
 
     # Remove at start/end
-    text = RE_FILLER_START.sub("", text)
-    text = RE_FILLER_END.sub("", text)
+    text = patterns.filler_start.sub("", text)
+    text = patterns.filler_end.sub("", text)
 
     # Remove remaining standalone fillers when they are the only token left between punctuation.
     # (Conservative: just remove the token, let spacing fixer handle the rest.)
-    text = RE_FILLER_STANDALONE.sub("", text)
+    text = patterns.filler_standalone.sub("", text)
 
-    text = _fix_spacing(text)
-    text = _capitalise_sentence_starts(text)
+    text = _fix_spacing(text, patterns)
+    text = _capitalise_sentence_starts(text, patterns)
 
     # Preserve empty utterances as empty string
     return text
 
 
-def cleanup_markdown(md: str) -> str:
-    out_lines: list[str] = []
+def _cleanup_speaker_line(match: re.Match) -> str:
+    speaker = match.group(1)
+    cleaned = cleanup_utterance(match.group(2).lstrip())
+
+    if cleaned:
+        return f"{speaker} {cleaned}"
+    return speaker
 
-    for line in md.splitlines():
-        m = RE_SPEAKER.match(line)
-        if not m:
-            out_lines.append(line)
-            continue
 
-        speaker = m.group(1)
-        utterance = m.group(2)
-        cleaned = cleanup_utterance(utterance)
+def cleanup_markdown(md: str) -> str:
+    md = RE_LINE_BREAK.sub("\n", md)
 
-        if cleaned:
-            out_lines.append(f"{speaker} {cleaned}")
-        else:
-            out_lines.append(f"{speaker}")
+    # Rewrite speaker lines in place; all other lines pass through untouched
+    cleaned = RE_SPEAKER.sub(_cleanup_speaker_line, md)
 
     # Ensure trailing newline
-    return "\n".join(out_lines).rstrip() + "\n"
+    return cleaned.rstrip() + "\n"
 
 
 def main() -> None:
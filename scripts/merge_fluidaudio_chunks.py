@@ -10,57 +10,180 @@ Handles:
 
 import json
 import argparse
+import os
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Dict, Any
-
-
-def cosine_similarity(a: List[float], b: List[float]) -> float:
-    """Compute cosine similarity between two embedding vectors."""
-    a = np.array(a)
-    b = np.array(b)
-    return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
+from typing import List, Dict, Any, Optional, Tuple
+
+# Optional: JIT-compile the centroid kernel with Numba (pip install numba).
+# Off by default because compiling costs more than it saves on typical chunk
+# sizes (and is repeated in every worker process); enable with
+# TRANSCRIBE_MERGE_NUMBA=1. Without numba the flag is ignored.
+numba = None
+if os.environ.get("TRANSCRIBE_MERGE_NUMBA", "0") == "1":
+    try:
+        import numba
+    except ImportError:
+        pass
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def load_json(json_path: Path) -> Any:
+    """Load a JSON file, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(Path(json_path).read_bytes())
+    with open(json_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@dataclass
+class SegmentArray:
+    """FluidAudio segments stored column-wise (one array per field).
+
+    Row i of every array describes segment i. Speakers are stored as integer
+    labels into speaker_ids, numbered in order of first appearance.
+    """
+    starts: np.ndarray
+    ends: np.ndarray
+    labels: np.ndarray
+    speaker_ids: List[str]
+    quality: np.ndarray
+    embeddings: np.ndarray
+
+    @classmethod
+    def from_json(cls, segments: List[Dict]) -> 'SegmentArray':
+        speaker_labels: Dict[str, int] = {}
+        labels = np.fromiter(
+            (speaker_labels.setdefault(seg['speakerId'], len(speaker_labels)) for seg in segments),
+            dtype=np.int64,
+            count=len(segments)
+        )
+        return cls(
+            starts=np.fromiter((seg['startTimeSeconds'] for seg in segments), dtype=np.float64, count=len(segments)),
+            ends=np.fromiter((seg['endTimeSeconds'] for seg in segments), dtype=np.float64, count=len(segments)),
+            labels=labels,
+            speaker_ids=list(speaker_labels.keys()),
+            quality=np.fromiter((seg['qualityScore'] for seg in segments), dtype=np.float64, count=len(segments)),
+            embeddings=np.asarray([seg['embedding'] for seg in segments], dtype=np.float64)
+        )
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+
+def write_json(json_path: Path, data: Any) -> None:
+    """Write JSON with 2-space indentation, using orjson when it is installed.
+
+    NumPy arrays (e.g. segment embeddings) are serialised as lists.
+    """
+    if orjson is not None:
+        Path(json_path).write_bytes(
+            orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+        )
+        return
+
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, default=lambda obj: obj.tolist())
+
+
+def normalise_rows(mat: np.ndarray) -> np.ndarray:
+    """L2-normalise each row so dot products become cosine similarities."""
+    return mat / np.linalg.norm(mat, axis=1, keepdims=True)
+
+
+def pairwise_cosine(new_mat: np.ndarray, existing_mat: np.ndarray) -> np.ndarray:
+    """Cosine similarity of every row of new_mat against every row of existing_mat."""
+    return normalise_rows(new_mat) @ normalise_rows(existing_mat).T
+
+
+def centroid_means(embeddings: np.ndarray, labels: np.ndarray, n_speakers: int) -> np.ndarray:
+    """Mean embedding per speaker label (labels index rows of the result)."""
+    sums = np.zeros((n_speakers, embeddings.shape[1]), dtype=embeddings.dtype)
+    np.add.at(sums, labels, embeddings)
+    counts = np.bincount(labels, minlength=n_speakers)
+    return sums / counts[:, None].astype(embeddings.dtype)
+
+
+if numba is not None:
+    # No fastmath: rows are summed in the same order as np.add.at above
+    @numba.njit(cache=True)
+    def _centroid_means_numba(embeddings: np.ndarray, labels: np.ndarray, n_speakers: int) -> np.ndarray:
+        """Loop version of centroid_means, used when TRANSCRIBE_MERGE_NUMBA=1."""
+        dim = embeddings.shape[1]
+        sums = np.zeros((n_speakers, dim), dtype=embeddings.dtype)
+        counts = np.zeros(n_speakers, dtype=np.int64)
+        for row in range(embeddings.shape[0]):
+            label = labels[row]
+            counts[label] += 1
+            for k in range(dim):
+                sums[label, k] += embeddings[row, k]
+        for label in range(n_speakers):
+            for k in range(dim):
+                sums[label, k] /= counts[label]
+        return sums
+
+
+def get_speaker_centroids(segments: SegmentArray) -> Dict[str, np.ndarray]:
+    """Compute average embedding for each speaker."""
+    # float32 is plenty for cosine similarity and halves the memory of float64
+    embeddings = segments.embeddings.astype(np.float32)
+    compute_means = _centroid_means_numba if numba is not None else centroid_means
+    means = compute_means(embeddings, segments.labels, len(segments.speaker_ids))
+    return {sid: means[label] for label, sid in enumerate(segments.speaker_ids)}
 
 
-def get_speaker_centroids(segments: List[Dict]) -> Dict[str, np.ndarray]:
-    """Compute average embedding for each speaker."""
-    speaker_embeddings: Dict[str, List[List[float]]] = {}
-    for seg in segments:
-        sid = seg['speakerId']
-        if sid not in speaker_embeddings:
-            speaker_embeddings[sid] = []
-        speaker_embeddings[sid].append(seg['embedding'])
+def load_chunk(chunk_file: Path) -> Tuple[float, Optional[SegmentArray], Dict[str, np.ndarray]]:
+    """
+    Load one chunk's segments and speaker centroids.
+    Returns (duration, segments, centroids); segments is None for an empty chunk.
+    """
+    data = load_json(chunk_file)
+    if not data['segments']:
+        return data['durationSeconds'], None, {}
 
-    centroids = {}
-    for sid, embeddings in speaker_embeddings.items():
-        centroids[sid] = np.mean(embeddings, axis=0)
-    return centroids
+    segments = SegmentArray.from_json(data['segments'])
+    return data['durationSeconds'], segments, get_speaker_centroids(segments)
 
 
 def map_speakers(
     new_centroids: Dict[str, np.ndarray],
-    existing_centroids: Dict[str, np.ndarray],
+    global_ids: List[str],
+    global_matrix: np.ndarray,
     threshold: float = 0.85
 ) -> Dict[str, str]:
     """
     Map speaker IDs from new chunk to existing speakers.
+    global_matrix holds one centroid row per speaker in global_ids.
     Returns mapping from new_id -> existing_id (or new unique ID if no match).
     """
     mapping = {}
-    next_id = max(int(sid) for sid in existing_centroids.keys()) + 1 if existing_centroids else 1
-
-    for new_sid, new_centroid in new_centroids.items():
-        best_match = None
-        best_sim = threshold
-
-        for existing_sid, existing_centroid in existing_centroids.items():
-            sim = cosine_similarity(new_centroid, existing_centroid)
-            if sim > best_sim:
-                best_sim = sim
-                best_match = existing_sid
-
-        if best_match:
-            mapping[new_sid] = best_match
+    next_id = max(int(sid) for sid in global_ids) + 1 if global_ids else 1
+
+    if not new_centroids:
+        return mapping
+
+    new_ids = list(new_centroids.keys())
+
+    # Cosine similarity of every new centroid against every existing one in a
+    # single matrix multiply: sim[i, j] compares new_ids[i] with global_ids[j]
+    if global_ids:
+        new_mat = np.stack(list(new_centroids.values()))
+        sim = pairwise_cosine(new_mat, global_matrix)
+        best = sim.argmax(axis=1)
+        best_sim = sim.max(axis=1)
+    else:
+        best = np.zeros(len(new_ids), dtype=int)
+        best_sim = np.full(len(new_ids), -np.inf)
+
+    for new_sid, match, match_sim in zip(new_ids, best, best_sim):
+        if match_sim > threshold:
+            mapping[new_sid] = global_ids[match]
         else:
             # New speaker not seen before
             mapping[new_sid] = str(next_id)
@@ -77,57 +200,96 @@ def merge_chunks(
 ) -> Dict[str, Any]:
     """Merge multiple FluidAudio JSON outputs into one."""
 
-    all_segments = []
-    global_centroids: Dict[str, np.ndarray] = {}
+    # Kept segments from each chunk, as column arrays with global speaker IDs
+    starts: List[np.ndarray] = []
+    ends: List[np.ndarray] = []
+    speakers: List[np.ndarray] = []
+    quality: List[np.ndarray] = []
+    embeddings: List[np.ndarray] = []
+    # Global speakers: running embedding sum and segment count per speaker, so
+    # global_sum[k] / global_count[k] is the centroid of speaker global_ids[k]
+    # over every chunk it has been matched in
+    global_ids: List[str] = []
+    global_sum = np.empty((0, 0), dtype=np.float32)
+    global_count = np.empty(0, dtype=np.int64)
     total_duration = 0
 
-    for i, (chunk_file, offset) in enumerate(zip(chunk_files, chunk_offsets)):
-        with open(chunk_file) as f:
-            data = json.load(f)
-
-        segments = data['segments']
-        if not segments:
+    # Parse chunks and compute their centroids in parallel; speaker mapping
+    # below depends on earlier chunks, so it stays sequential
+    workers = min(len(chunk_files), os.cpu_count() or 1)
+    if workers <= 1:
+        # A worker process (re-importing NumPy) isn't worth it for one chunk
+        loaded = [load_chunk(chunk_file) for chunk_file in chunk_files]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            loaded = list(executor.map(load_chunk, chunk_files))
+
+    for i, ((duration, segments, chunk_centroids), offset) in enumerate(zip(loaded, chunk_offsets)):
+        if segments is None:
             continue
 
-        # Get centroids for this chunk
-        chunk_centroids = get_speaker_centroids(segments)
-
         # Map speakers to global IDs
         if i == 0:
             # First chunk - speakers become global
             speaker_map = {sid: sid for sid in chunk_centroids.keys()}
-            global_centroids = chunk_centroids.copy()
         else:
             # Map to existing speakers
-            speaker_map = map_speakers(chunk_centroids, global_centroids)
-
-            # Update global centroids with new speakers
-            for new_sid, global_sid in speaker_map.items():
-                if global_sid not in global_centroids:
-                    global_centroids[global_sid] = chunk_centroids[new_sid]
+            global_matrix = global_sum / global_count[:, None]
+            speaker_map = map_speakers(chunk_centroids, global_ids, global_matrix)
+
+        # Add empty rows for speakers not seen before
+        new_ids = [gid for gid in dict.fromkeys(speaker_map.values()) if gid not in global_ids]
+        if new_ids:
+            dim = next(iter(chunk_centroids.values())).shape[0]
+            new_sum = np.zeros((len(new_ids), dim), dtype=np.float32)
+            global_sum = np.vstack([global_sum, new_sum]) if global_ids else new_sum
+            global_count = np.concatenate([global_count, np.zeros(len(new_ids), dtype=np.int64)])
+            global_ids.extend(new_ids)
+
+        # Fold this chunk's embeddings into the running sums of the speakers
+        # they were mapped to (new and matched alike)
+        chunk_counts = np.bincount(segments.labels, minlength=len(segments.speaker_ids))
+        chunk_sums = np.stack(list(chunk_centroids.values())) * chunk_counts[:, None]
+        rows = [global_ids.index(speaker_map[sid]) for sid in segments.speaker_ids]
+        np.add.at(global_sum, rows, chunk_sums)
+        np.add.at(global_count, rows, chunk_counts)
 
         # Process segments
-        for seg in segments:
-            start = seg['startTimeSeconds'] + offset
-            end = seg['endTimeSeconds'] + offset
+        chunk_starts = segments.starts + offset
 
-            # Skip segments in overlap region that duplicate previous chunk
-            if i > 0 and start < chunk_offsets[i - 1] + chunk_size:
-                continue
+        # Skip segments in overlap region that duplicate previous chunk
+        if i > 0:
+            keep = chunk_starts >= chunk_offsets[i - 1] + chunk_size
+        else:
+            keep = np.ones(len(segments), dtype=bool)
 
-            new_seg = {
-                'startTimeSeconds': start,
-                'endTimeSeconds': end,
-                'speakerId': speaker_map[seg['speakerId']],
-                'qualityScore': seg['qualityScore'],
-                'embedding': seg['embedding']
-            }
-            all_segments.append(new_seg)
+        label_to_global = np.array([speaker_map[sid] for sid in segments.speaker_ids], dtype=object)
+        starts.append(chunk_starts[keep])
+        ends.append(segments.ends[keep] + offset)
+        speakers.append(label_to_global[segments.labels[keep]])
+        quality.append(segments.quality[keep])
+        embeddings.append(segments.embeddings[keep])
 
-        total_duration = max(total_duration, data['durationSeconds'] + offset)
+        total_duration = max(total_duration, duration + offset)
 
-    # Sort by start time
-    all_segments.sort(key=lambda x: x['startTimeSeconds'])
+    # Sort by start time; chunks are already nearly ordered, which the stable
+    # (run-aware) sort exploits
+    all_segments = []
+    if starts:
+        all_starts = np.concatenate(starts)
+        all_ends = np.concatenate(ends)
+        all_speakers = np.concatenate(speakers)
+        all_quality = np.concatenate(quality)
+        all_embeddings = np.concatenate(embeddings)
+
+        for row in np.argsort(all_starts, kind='stable'):
+            all_segments.append({
+                'startTimeSeconds': float(all_starts[row]),
+                'endTimeSeconds': float(all_ends[row]),
+                'speakerId': all_speakers[row],
+                'qualityScore': float(all_quality[row]),
+                'embedding': all_embeddings[row]
+            })
 
     # Build output
     result = {
@@ -135,7 +297,7 @@ def merge_chunks(
         'config': {'merged': True, 'chunks': len(chunk_files)},
         'durationSeconds': total_duration,
         'segments': all_segments,
-        'speakerCount': len(global_centroids),
+        'speakerCount': len(global_ids),
         'timestamp': chunk_files[0].stat().st_mtime if chunk_files else 0
     }
 
@@ -159,8 +321,7 @@ def main():
 
     result = merge_chunks(args.chunks, offsets, args.chunk_size, args.overlap)
 
-    with open(args.output, 'w') as f:
-        json.dump(result, f, indent=2)
+    write_json(args.output, result)
 
     print(f"Merged {len(args.chunks)} chunks")
     print(f"Total segments: {len(result['segments'])}")